@@ -19,6 +19,7 @@ import math
 import json
 import tempfile
 import shutil
+import threading
 import logging
 
 import numpy as np
@@ -33,6 +34,7 @@ from .align_params import SyncDetectorSummarizerParams
 __all__ = [
     'SyncDetectorSummarizerParams',
     'SyncDetector',
+    'cached_align',
     'main',
     ]
 
@@ -345,6 +347,52 @@ class SyncDetector(object):
         return result
 
 
+_align_results = {}
+_align_results_lock = threading.Lock()
+
+
+def cached_align(
+    files, params=SyncDetectorSummarizerParams(),
+    known_delay_map={}, clear_cache=False):
+    """
+    Same as `SyncDetector(params, clear_cache).align(files, known_delay_map)`,
+    but the result is memoized within the process, so calling it again
+    with the same files and parameters does not decode and summarize the
+    audio tracks again. (The cache on the disk saves the summaries among
+    processes, but reading them back is still not cheap.)
+
+    `files` must be the result of `check_and_decode_filenames`, they are
+    not checked again here.
+    """
+    # a file rewritten in place must not hit the old result. (one stat
+    # for each distinct file, the stacking repeats files to fill cells.)
+    stats = {}
+    for f in files:
+        if f not in stats:
+            st = os.stat(f)
+            stats[f] = (st.st_mtime, st.st_size)
+    key = _cache.make_cache_key(
+        files=files,
+        stats=[stats[f] for f in files],
+        params=sorted(params.__dict__.items()),
+        known_delay_map=json.dumps(known_delay_map, sort_keys=True))
+    # The lock guards the memo only, aligning runs outside of it so as
+    # not to serialize unrelated alignments.
+    with _align_results_lock:
+        if clear_cache:
+            _align_results.clear()
+        result = _align_results.get(key)
+    if result is None:
+        with SyncDetector(
+            params=params, clear_cache=clear_cache) as sd:
+            result = sd.align(
+                files, known_delay_map=known_delay_map)
+        with _align_results_lock:
+            _align_results[key] = result
+    # callers are free to modify what they got.
+    return [dict(r) for r in result]
+
+
 def _bailout(parser):
     parser.print_help()
     sys.exit(1)
@@ -28,6 +28,15 @@ __all__ = [
 _logger = logging.getLogger(__name__)
 
 
+# defaults of options given in JSON format
+_DEFAULT_OUTPARAMS = json.dumps(EditorOutputParams().__dict__)
+_DEFAULT_V_EXTRA_FFARGS = json.dumps([
+        "-color_primaries", "bt709",
+        "-color_trc", "bt709",
+        "-colorspace", "bt709"])
+_DEFAULT_A_EXTRA_FFARGS = json.dumps([])
+
+
 # ##################################
 #
 # logging
@@ -114,8 +123,7 @@ for some reason, specify this.''' % (
             help="Specifying the output file. (default: %(default)s)")
 
     def editor_add_output_params_argument(self, notice=""):
-        default = EditorOutputParams()
-        default = json.dumps(default.__dict__)
+        default = _DEFAULT_OUTPARAMS
         self.add_argument(
             "--outparams",
             help="""Parameters for output. Pass in JSON format, 
@@ -150,13 +158,13 @@ filters can be used.""")
     def editor_add_extra_ffargs_arguments(self):
         self.add_argument(
             '--v_extra_ffargs', type=str,
-            default=json.dumps(["-color_primaries", "bt709", "-color_trc", "bt709", "-colorspace", "bt709"]),
+            default=_DEFAULT_V_EXTRA_FFARGS,
             help="""\
 Additional arguments to ffmpeg for output video streams. Pass list in JSON format. \
 (default: '%(default)s')""")
         self.add_argument(
             '--a_extra_ffargs', type=str,
-            default=json.dumps([]),
+            default=_DEFAULT_A_EXTRA_FFARGS,
             help="""\
 Additional arguments to ffmpeg for output audio streams. Pass list in JSON format. \
 (default: '%(default)s')""")
@@ -16,9 +16,9 @@ import re
 import json
 import hashlib
 import logging
+import tempfile
 from itertools import chain
-
-import scipy.io.wavfile
+from functools import lru_cache
 
 __all__ = [
     "check_call", "check_stderroutput",
@@ -32,14 +32,6 @@ __all__ = [
 _logger = logging.getLogger(__name__)
 
 
-if hasattr("", "decode"):  # python 2
-    def _encode(s):
-        return s.encode(sys.getfilesystemencoding())
-else:
-    def _encode(s):
-        return s
-
-
 # ##################################
 #
 # low-level APIs
@@ -62,26 +54,28 @@ class pipes_quote(object):
         
 def _filter_args(*cmd):
     """
-    do filtering None, and do encoding items to bytes
-    (in Python 2).
+    do filtering None.
     """
-    return list(map(_encode, filter(None, *cmd)))
+    return list(filter(None, *cmd))
 
     
+def _set_popen_defaults(kwargs):
+    # The descriptors we open are not inheritable (PEP 446), so letting
+    # Popen close all the others before exec is only a cost per spawn.
+    kwargs.setdefault("close_fds", False)
+    return kwargs
+
+
 def check_call(*popenargs, **kwargs):
     """
     Basically do simply forward args to subprocess#check_call, but this
-    does two things:
-
-    * It does encoding these to bytes in Python 2.
-    * It does omitting `None` in *cmd.
-    
+    does omitting `None` in *cmd.
     """
     cmd = kwargs.get("args")
     if cmd is None:
         cmd = popenargs[0]
     subprocess.check_call(
-        _filter_args(cmd), **kwargs)
+        _filter_args(cmd), **_set_popen_defaults(kwargs))
 
 
 def check_stderroutput(*popenargs, **kwargs):
@@ -91,10 +85,7 @@ def check_stderroutput(*popenargs, **kwargs):
     discards the standard error output. This function is obtained by
     rewriting subprocess.check_output for standard error output.
 
-    And this does two things:
-
-    * It does encoding these to bytes in Python 2.
-    * It does omitting `None` in *cmd.
+    And this does omitting `None` in *cmd.
     """
     if 'stderr' in kwargs:
         raise ValueError(
@@ -106,7 +97,7 @@ def check_stderroutput(*popenargs, **kwargs):
     process = subprocess.Popen(
         _filter_args(cmd),
         stderr=subprocess.PIPE,
-        **kwargs)
+        **_set_popen_defaults(kwargs))
     stdout_output, stderr_output = process.communicate()
     retcode = process.poll()
     if retcode:
@@ -148,8 +139,12 @@ def duration_to_hhmmss(*durations):
         return _conv(durations[0])
 
 
+@lru_cache(maxsize=1024)
 def parse_time(s):
     """
+    Definition files often repeat the same time string, so the
+    results are cached.
+
     >>> print("%.3f" % parse_time(3.2))
     3.200
     >>> print("%.3f" % parse_time(3))
@@ -201,6 +196,11 @@ def read_audio(audio_file):
     # this package deals with, the most problematic is the memory used. For example, If
     # a poor PC with only 4 GB of physical memory handles a movie of about "VERY SHORT" 20
     # minutes, it will cause you to fall into a state where you can not do any work.
+    #
+    # scipy is imported here, not at the top: cli_common pulls this module in,
+    # and "--help" should not have to wait for scipy to load.
+    import scipy.io.wavfile
+
     rate, data = scipy.io.wavfile.read(
         audio_file,
         mmap=True)
@@ -472,6 +472,11 @@ def call_ffmpeg_with_filtercomplex(
     calling is possible if including up to deprecated options. but if it
     is called only by `-filter_complex` and` -map`, it is almost the same
     way of calling it.
+
+    The filter graph is never put on the command line. It is always
+    given by `-filter_complex_script` (through a pipe or a temporary
+    file), so graphs of any size can be passed without hitting the
+    limit of the length of the command line.
     """
     if relpath:
         def _pathconv(f):
@@ -483,15 +488,15 @@ def call_ffmpeg_with_filtercomplex(
         [('-i', _pathconv(f)) for f in inputfiles])
     #
     if vmap:
-        maps = zip(vmap, amap)  # [("[v0]", "[a0]"), ("[v1]", "[a1]"), ...]
+        # (("[v0]", "[a0]"), ("[v1]", "[a1]"), ...)
+        maps = tuple(zip(vmap, amap))
     elif amap:
-        maps = [amap]
+        maps = (tuple(amap),)
     else:
         raise ValueError("no maps")
-    v_extra_ffargs = v_extra_ffargs if vmap else []
-    a_extra_ffargs = a_extra_ffargs if amap else []
-
-    extra_ffargs = v_extra_ffargs + a_extra_ffargs
+    extra_ffargs = tuple(chain(
+            v_extra_ffargs if vmap else (),
+            a_extra_ffargs if amap else ()))
     #
     if len(outfiles) > 1:
         map_args = []
@@ -514,6 +519,8 @@ def call_ffmpeg_with_filtercomplex(
         buf = sys.stdout
     if mode == "script_bash":
         _quote = pipes_quote()
+        # Written piece by piece, so that the filter graph (which can be
+        # huge) is not copied once more into one formatted script.
         buf.write("""\
 #! /bin/sh
 # -*- coding: utf-8 -*-
@@ -522,11 +529,10 @@ ffmpeg -hide_banner -y \\
   {} \\
   -filter_complex_script pipe: \\
   {} << __END__
-{}
-__END__
 """.format(" ".join(_quote.map(ifile_args)),
-           " ".join(_quote.map(map_args)),
-           filter_complex).encode("utf-8"))
+           " ".join(_quote.map(map_args))).encode("utf-8"))
+        buf.write(filter_complex.encode("utf-8"))
+        buf.write(b"\n__END__\n")
     else:
         cmd = ["ffmpeg", "-hide_banner", "-y"]
         cmd.extend(ifile_args)
@@ -536,11 +542,16 @@ __END__
         # you can not give file-like objects that do not support
         # fileno() as stdin. So, what we can do is to create a
         # temporary file and give it.
-        d = hashlib.md5()
-        [d.update(c.encode("utf-8")) for c in cmd + map_args]
-        tempfn = os.path.join(
-            os.environ.get("TEMP", "/tmp"),
-            d.hexdigest() + ".txt")
+        if mode == "script_python":
+            d = hashlib.md5()
+            [d.update(c.encode("utf-8")) for c in cmd + map_args]
+            tempfn = os.path.join(
+                tempfile.gettempdir(),
+                d.hexdigest() + ".txt")
+        else:
+            # the graph of a large stacking can be huge, and it is written
+            # right now, so take a unique name instead of a predictable one.
+            fd, tempfn = tempfile.mkstemp(suffix=".txt")
         cmd.extend(["-filter_complex_script", tempfn])
         cmd.extend(map_args)
         if mode == "script_python":
@@ -559,7 +570,7 @@ filter_complex = '''\\
 {}'''
 
 tempfn = {}
-with io.open(tempfn, "w") as fo:
+with io.open(tempfn, "w", encoding="utf-8") as fo:
     fo.write(filter_complex)
 
 cmd = {}
@@ -574,7 +585,7 @@ finally:
         pass
 """.format(filter_complex, json.dumps(tempfn), cmdstr).encode("utf-8"))
         else:
-            with io.open(tempfn, "w") as fo:
+            with io.open(fd, "w", encoding="utf-8") as fo:
                 fo.write(filter_complex)
             try:
                 check_call(cmd)
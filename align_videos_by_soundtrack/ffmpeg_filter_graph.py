@@ -9,7 +9,6 @@ from __future__ import absolute_import
 from itertools import chain
 from collections import defaultdict
 import logging
-import numpy as np  # for base_repr
 
 __all__ = [
     "mk_single_filter_body",
@@ -55,6 +54,25 @@ def mk_single_filter_body(name, *args, **kwargs):
         ":".join(all_args))
 
 
+_BASE36_DIGITS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _base36(n):
+    """
+    Same as numpy.base_repr(n, 36) for n >= 0, without loading numpy.
+
+    >>> print(" ".join(_base36(n) for n in (0, 9, 10, 35, 36, 1295, 1296)))
+    0 9 A Z 10 ZZ 100
+    """
+    if n < 36:
+        return _BASE36_DIGITS[n]
+    digits = []
+    while n:
+        n, r = divmod(n, 36)
+        digits.append(_BASE36_DIGITS[r])
+    return "".join(reversed(digits))
+
+
 _olab_counter = defaultdict(int)
 
 
@@ -92,6 +110,8 @@ class Filter(object):
     >>> print(f.to_str())
     [0:a][1:a]concat[a1]
     """
+    __slots__ = ("iv", "ia", "_filters", "ov", "oa")
+
     def __init__(self):
         self.iv = []  # the labels of input video streams
         self.ia = []  # the labels of input audio streams
@@ -100,10 +120,11 @@ class Filter(object):
         self.oa = []  # the labels of output audio streams
 
     def _labels_to_str(self, v, a):
-        if not v and a:
-            v = [""] * len(a)
-        if not a and v:
-            a = [""] * len(v)
+        # most filters have labels of one side only.
+        if not a:
+            return "".join(v)
+        if not v:
+            return "".join(a)
         return "".join(chain.from_iterable(zip(v, a)))
         
     def add_filter(self, name, *args, **kwargs):
@@ -120,13 +141,13 @@ class Filter(object):
         global _olab_counter
         _olab_counter[templ] += 1
         self.ov.append(templ % dict(
-                counter=np.base_repr(_olab_counter[templ], 36)))
+                counter=_base36(_olab_counter[templ])))
 
     def append_outlabel_a(self, templ="[a%(counter)s]"):
         global _olab_counter
         _olab_counter[templ] += 1
         self.oa.append(templ % dict(
-                counter=np.base_repr(_olab_counter[templ], 36)))
+                counter=_base36(_olab_counter[templ])))
 
     def to_str(self):
         ilabs = self._labels_to_str(self.iv, self.ia)
@@ -136,45 +157,52 @@ class Filter(object):
 
 
 class ConcatWithGapFilterGraphBuilder(object):
+    __slots__ = (
+        "_ident", "_tmpl_gapv", "_tmpl_gapa", "_bodyv", "_bodya",
+        "_result", "_fconcat", "_gapno", "_numbody")
+
     def __init__(self, ident, w=960, h=540, fps=29.97, sample_rate=44100):
         self._ident = ident
 
-        # black video stream
+        # Everything constant is baked into the templates here, only the
+        # variable parts are left as positional "%" placeholders.
+
+        # black video stream (duration, gapno)
         fpadv = Filter()
         fpadv.add_filter(
-            "color", s="%dx%d" % (w, h), d="{duration:.3f}")
+            "color", s="%dx%d" % (w, h), d="%.3f")
         fpadv.add_filter("fps", fps="%.2f" % fps)
         fpadv.add_filter("setsar", "1")
-        fpadv.ov.append("[gap{gapno}v%s]" % ident)
+        fpadv.ov.append("[gap%%sv%s]" % ident)
         self._tmpl_gapv = (fpadv.to_str(), "".join(fpadv.ov))
 
-        # aevalsrc
+        # aevalsrc (duration, gapno)
         nch = 2
         fpada = Filter()
         fpada.add_filter(
             "aevalsrc",
             exprs="'%s'" % ("|".join(["0"] * nch)),
             sample_rate="%d" % sample_rate,
-            d="{duration:.3f}")
-        fpada.oa.append("[gap{{gapno}}a{ident}]".format(ident=ident))
+            d="%.3f")
+        fpada.oa.append("[gap%%sa%s]" % ident)
         self._tmpl_gapa = (
             fpada.to_str(), "".join(fpada.oa))
 
-        # filter to original video stream
+        # filter to original video stream (stream_no, v_filter_extra, bodyident)
         fbodyv = Filter()
-        fbodyv.iv.append("[{stream_no}:v]")
+        fbodyv.iv.append("[%s:v]")
         fbodyv.add_filter("fps", fps="%.2f" % fps)
-        fbodyv.add_filter("{v_filter_extra}scale", w, h)
+        fbodyv.add_filter("%sscale", w, h)
         fbodyv.add_filter("setsar", "1")
-        fbodyv.ov.append("[v%s_{bodyident}]" % ident)
+        fbodyv.ov.append("[v%s_%%s]" % ident)
         self._bodyv = (fbodyv.to_str(), "".join(fbodyv.ov))
 
-        # filter to original audio stream
+        # filter to original audio stream (stream_no, a_filter_extra, bodyident)
         fbodya = Filter()
-        fbodya.ia.append("[{stream_no}:a]")
+        fbodya.ia.append("[%s:a]")
         fbodya.add_filter(
-            "{a_filter_extra}aresample", sample_rate)
-        fbodya.oa.append("[a%s_{bodyident}]" % ident)
+            "%saresample", sample_rate)
+        fbodya.oa.append("[a%s_%%s]" % ident)
         self._bodya = (fbodya.to_str(), "".join(fbodya.oa))
 
         #
@@ -186,11 +214,9 @@ class ConcatWithGapFilterGraphBuilder(object):
     def add_video_gap(self, duration):
         if duration <= 0:
             return self
-        self._result.append(
-            self._tmpl_gapv[0].format(
-                gapno=np.base_repr(self._gapno, 36), duration=duration))
-        self._fconcat.iv.append(self._tmpl_gapv[1].format(
-                gapno=np.base_repr(self._gapno, 36)))
+        gapno = _base36(self._gapno)
+        self._result.append(self._tmpl_gapv[0] % (duration, gapno))
+        self._fconcat.iv.append(self._tmpl_gapv[1] % gapno)
         self._gapno += 1
 
         return self
@@ -198,35 +224,31 @@ class ConcatWithGapFilterGraphBuilder(object):
     def add_audio_gap(self, duration):
         if duration <= 0:
             return self
-        self._result.append(
-            self._tmpl_gapa[0].format(
-                gapno=np.base_repr(self._gapno, 36), duration=duration))
-        self._fconcat.ia.append(self._tmpl_gapa[1].format(
-                gapno=np.base_repr(self._gapno, 36)))
+        gapno = _base36(self._gapno)
+        self._result.append(self._tmpl_gapa[0] % (duration, gapno))
+        self._fconcat.ia.append(self._tmpl_gapa[1] % gapno)
         self._gapno += 1
 
         return self
 
     def add_video_content(self, stream_no, v_filter_extra):
-        self._result.append(
-            self._bodyv[0].format(
-                stream_no=stream_no,
-                bodyident=np.base_repr(self._numbody, 36),
-                v_filter_extra=v_filter_extra + "," if v_filter_extra else ""))
-        self._fconcat.iv.append(self._bodyv[1].format(
-                bodyident=np.base_repr(self._numbody, 36)))
+        bodyident = _base36(self._numbody)
+        self._result.append(self._bodyv[0] % (
+                stream_no,
+                v_filter_extra + "," if v_filter_extra else "",
+                bodyident))
+        self._fconcat.iv.append(self._bodyv[1] % bodyident)
         self._numbody += 1
 
         return self
 
     def add_audio_content(self, stream_no, a_filter_extra):
-        self._result.append(
-            self._bodya[0].format(
-                stream_no=stream_no,
-                bodyident=np.base_repr(self._numbody, 36),
-                a_filter_extra=a_filter_extra + "," if a_filter_extra else ""))
-        self._fconcat.ia.append(self._bodya[1].format(
-                bodyident=np.base_repr(self._numbody, 36)))
+        bodyident = _base36(self._numbody)
+        self._result.append(self._bodya[0] % (
+                stream_no,
+                a_filter_extra + "," if a_filter_extra else "",
+                bodyident))
+        self._fconcat.ia.append(self._bodya[1] % bodyident)
         self._numbody += 1
 
         return self
@@ -208,6 +208,21 @@ _sample_editinfo = """\
 }
 """
 
+# "video_mode" -> (template of "video_mode_params" item, mandatory keys)
+_VIDEO_MODE_PARAMS_TEMPLATES = {
+    "overlay": ({
+            "mode": "...",
+            "cropping": "...",
+            "overlay": "...",
+            "partner_layer": "..."
+            }, ["overlay"]),
+    "blend": ({
+            "blend": "...",
+            "bottom_layer": "..."
+            }, ["blend"]),
+    }
+
+
 def validate_definition(definition):
     tmpl = json_loads(_sample_editinfo)
     #
@@ -228,35 +243,34 @@ def validate_definition(definition):
     c, t = definition["intercuts"], tmpl["intercuts"]
     _check_type(c, t, "intercuts")
 
-    nfiles = len(definition["inputs"]["sub"]) + 1
-    for i, c in enumerate(definition["intercuts"]):
+    intercuts = definition["intercuts"]
+    for i, c in enumerate(intercuts):
         t = tmpl["intercuts"][0]
         _check_dict(c, t, ["sub_idx"], "'intercuts[%d]'" % i)
-        if (c["sub_idx"] + 1) < 0 or nfiles <= (c["sub_idx"] + 1):
-            # It is a secret that you can express "main" with -1.
-            _logger.error("""\
+
+    nfiles = len(definition["inputs"]["sub"]) + 1
+    # It is a secret that you can express "main" with -1.
+    idxs = np.fromiter(
+        (c["sub_idx"] + 1 for c in intercuts),
+        dtype=np.int64, count=len(intercuts))
+    bad = np.flatnonzero((idxs < 0) | (idxs >= nfiles))
+    if bad.size:
+        i = bad[0]
+        _logger.error("""\
 %s: sub_idx(=%d) is out of range.""" % (
-                    "'intercuts[%d]'" % i,
-                    c["sub_idx"]))
-            sys.exit(1)
-        if c["video_mode"] == "overlay":
-            validate_list_of_dict_one_by_template(
-                c["video_mode_params"], {
-                    "mode": "...",
-                    "cropping": "...",
-                    "overlay": "...",
-                    "partner_layer": "..."
-                    }, ["overlay"],
-                """(because "video_mode" is "overlay",) \
-intercuts[%d]["video_mode_params"]""" % i, list_size_max=1)
-        elif c["video_mode"] == "blend":
-            validate_list_of_dict_one_by_template(
-                c["video_mode_params"], {
-                    "blend": "...",
-                    "bottom_layer": "..."
-                    }, ["blend"],
-                """(because "video_mode" is "blend",) \
-intercuts[%d]["video_mode_params"]""" % i, list_size_max=1)
+                "'intercuts[%d]'" % i,
+                intercuts[i]["sub_idx"]))
+        sys.exit(1)
+
+    for i, c in enumerate(intercuts):
+        vm = c.get("video_mode")
+        if vm not in _VIDEO_MODE_PARAMS_TEMPLATES:
+            continue  # "select" has nothing to validate here.
+        ptmpl, pmandkeys = _VIDEO_MODE_PARAMS_TEMPLATES[vm]
+        validate_list_of_dict_one_by_template(
+            c.get("video_mode_params"), ptmpl, pmandkeys,
+            """(because "video_mode" is "%s",) \
+intercuts[%d]["video_mode_params"]""" % (vm, i), list_size_max=1)
 
 
 #
@@ -273,9 +287,20 @@ def translate_inputs_definition(definition):
             }
         for inp in [_inputs["main"]] + _inputs["sub"]]
 
-    
-def translate_intercuts_definition(definition, einf):
+
+def _offsets_and_durations(einf):
+    # The offsets of each media from "main" and the original durations,
+    # these are constant through an editing.
+    pads = np.fromiter(
+        (e["pad"] for e in einf), dtype=np.float64, count=len(einf))
+    durs = np.fromiter(
+        (e["orig_duration"] for e in einf), dtype=np.float64, count=len(einf))
+    return pads - pads[0], durs
+
+
+def translate_intercuts_definition(definition, einf, offs_durs=None):
     _intercuts = definition["intercuts"]  # as human readable
+    offs, durs = offs_durs if offs_durs else _offsets_and_durations(einf)
     def _get_idx(p):
         if p == "main":
             return 0
@@ -303,8 +328,8 @@ def translate_intercuts_definition(definition, einf):
             "a_extra_filter": _intercuts[i].get(
                 "a_extra_filter", ""),
             }
-        off = einf[ins["idx"]]["pad"] - einf[0]["pad"]
-        dur = einf[ins["idx"]]["orig_duration"]
+        off = offs[ins["idx"]]
+        dur = durs[ins["idx"]]
         time_origin = _intercuts[i].get("time_origin", "sub")
         maincounting = time_origin == "main"
         # Let's fill in unspecified time. We must pay attention
@@ -350,55 +375,40 @@ def translate_intercuts_definition(definition, einf):
 
 
 def _make_list_of_trims(definition, known_delay_map, summarizer_params, outparams, clear_cache):
-    def _round_time(t):
-        # Round the specified "seconds" to a multiple of the
-        # time width between video frames. This is to prevent
-        # the difference between the trim and atrim clipping
-        # width becoming bigger because the video is far coarser
-        # in resolution.
-        if outparams.fps:
-            nvframes = np.floor(t * outparams.fps)
-            return nvframes / outparams.fps
-        else:
-            return t
-    #
-    def _mk_trims_table(inputs, intercuts, einf):
+    def _mk_trims_table(inputs, intercuts, offs, durs):
         # result = [
         #   [[s1, e1],...],  # for idx=0
         #   ...
         #   [[s1, e1],...],  # for idx=n
         #   ...
         # ]
-        _tmp = []  # for idx=0
-        for ins in intercuts:
-            _tmp.append([ins["start_time"], ins["end_time"]])
-            _tmp[-1][0] = max(
-                _tmp[-1][0],
-                inputs[0]["start_time"])
+        n = len(intercuts)
+        starts = np.fromiter(
+            (ins["start_time"] for ins in intercuts),
+            dtype=np.float64, count=n)
+        ends = np.fromiter(
+            (ins["end_time"] for ins in intercuts),
+            dtype=np.float64, count=n)
+        np.maximum(starts, inputs[0]["start_time"], out=starts)
         # Let's make adjustments so as not to overlap. Let's give
         # priority to the material that comes later in time.
-        _tmp.sort()
-        result = np.array([_tmp])
-        for i in range(len(_tmp) - 1):
-            if result[0][i][1] > result[0][i + 1][0]:
-                result[0][i][1] = result[0][i + 1][0]
-        result = _round_time(result)
-        for idx in range(1, len(einf)):
-            off = einf[idx]["pad"] - einf[0]["pad"]
-            result = np.vstack((result, [result[0] - off]))
-        for idx in range(len(einf)):
-            off = einf[idx]["pad"] - einf[0]["pad"]
-            dur = min(einf[idx]["orig_duration"], inputs[0]["end_time"] - off)
-            result[idx][np.where(result[idx] > dur)] = dur
-        return result
+        order = np.lexsort((ends, starts))
+        starts, ends = starts[order], ends[order]
+        np.minimum(ends[:-1], starts[1:], out=ends[:-1])
+        result = _round_time(np.stack((starts, ends), axis=1))  # for idx=0
+        result = result - offs[:, np.newaxis, np.newaxis]
+        dur = np.minimum(durs, inputs[0]["end_time"] - offs)
+        return np.minimum(result, dur[:, np.newaxis, np.newaxis])
     #
     inputs = translate_inputs_definition(definition)
     files = [inp["file"] for inp in inputs]
+    basenames = list(map(os.path.basename, files))  # for messages
     with SyncDetector(
         params=summarizer_params,
         clear_cache=clear_cache) as sd:
         einf = sd.align(files, known_delay_map=known_delay_map)
-    intercuts = translate_intercuts_definition(definition, einf)
+    offs, durs = _offsets_and_durations(einf)
+    intercuts = translate_intercuts_definition(definition, einf, (offs, durs))
 
     #
     qual = SyncDetector.summarize_stream_infos(einf)
@@ -406,19 +416,35 @@ def _make_list_of_trims(definition, known_delay_map, summarizer_params, outparam
     if not all(qual["has_video"]):
         outparams.fps = 0.
 
+    # outparams.fps is fixed from here, so choose the implementations
+    # once instead of testing it on every call.
+    fps = outparams.fps
+    if fps:
+        frame_dur = 1. / fps
+
+        def _round_time(t):
+            # Round the specified "seconds" to a multiple of the
+            # time width between video frames. This is to prevent
+            # the difference between the trim and atrim clipping
+            # width becoming bigger because the video is far coarser
+            # in resolution.
+            return np.floor(t * fps) / fps
+
+        def _desired_dur_is_too_small(s, e):
+            # trim doesn't work if dur is smaller than gap between frames.
+            return s < 0 or e < 0 or (e - s) < frame_dur
+    else:
+        def _round_time(t):
+            return t
+
+        def _desired_dur_is_too_small(s, e):
+            return s < 0 or e < 0 or np.isclose(s, e)
+
     # make a list of time ranges which will be used as trim, and atrim.
     trims_list = []
     st_main = inputs[0]["start_time"]
-    def _desired_dur_is_too_small(s, e):
-        if s < 0 or e < 0:
-            return True
-        # trim doesn't work if dur is smaller than gap between frames.
-        if outparams.fps:
-            return (e - s) < 1./outparams.fps
-        else:
-            return np.isclose(s, e)
 
-    base_trims_table = _mk_trims_table(inputs, intercuts, einf)
+    base_trims_table = _mk_trims_table(inputs, intercuts, offs, durs)
     last = 0  # default bottom layer for blend
     def _get_trims(i, idx):
         s, e = base_trims_table[idx][i]
@@ -440,23 +466,23 @@ def _make_list_of_trims(definition, known_delay_map, summarizer_params, outparam
 Negative time was found %s for '%s'. \
 We used '%s' %s instead.""",
                                  duration_to_hhmmss(s, e),
-                                 os.path.basename(files[idx]),
-                                 os.path.basename(files[alt]),
+                                 basenames[idx],
+                                 basenames[alt],
                                  duration_to_hhmmss(sa, ea))
                     return (alt, sa, ea)
             else:
                 _logger.error("""\
 Negative time was found %s for '%s'. """,
                               duration_to_hhmmss(s, e),
-                              os.path.basename(files[idx]))
+                              basenames[idx])
                 sys.exit(1)
 
-    for i, ins in enumerate(intercuts):
-        if base_trims_table[0][i][0] >= base_trims_table[0][i][1]:
-            # Start >= end, that is, it was completely filled in
-            # the following segment.
-            continue
-
+    # Skip the segments whose start >= end, that is, those which were
+    # completely filled in the following segment.
+    alive = np.flatnonzero(
+        base_trims_table[0, :, 0] < base_trims_table[0, :, 1])
+    for i in alive:
+        ins = intercuts[i]
         trims_list.append({
                 k: ins[k] for k in (
                     "video_mode", "video_mode_params",
@@ -483,16 +509,16 @@ Negative time was found %s for '%s'. """,
                 _get_trims(
                     i,
                     params[0].get(
-                        "partner_layer", int(last))))
+                        "partner_layer", last)))
         else:  # select
             trims.append(_get_trims(i, params[0]))
         astart_of_use_indexes = len(trims)
         trims.extend(
             [_get_trims(i, p) for p in ins["audio_mode_params"]])
-        trims = np.array(trims)
-        trims[:,2] = trims[:,1] + (trims[:,2] - trims[:,1]).min()
+        min_dur = min(e - s for _, s, e in trims)
+        trims = [(idx, s, s + min_dur) for idx, s, _ in trims]
         #
-        if not _desired_dur_is_too_small(trims[0,1], trims[0,2]):
+        if not _desired_dur_is_too_small(trims[0][1], trims[0][2]):
             res = {"videos": [], "audios": []}
             if ins["video_mode"] == "overlay":
                 p = ins["video_mode_params"][0]
@@ -511,12 +537,11 @@ Negative time was found %s for '%s'. """,
             else:
                 res["videos"].append(trims[1])
                 last = res["videos"][-1][0] 
-            for t in trims[astart_of_use_indexes:]:
-                res["audios"].append(t)
+            res["audios"].extend(trims[astart_of_use_indexes:])
             #
             trims_list[-1]["intercuts"] = res
-        st_main = trims[0,2]
-    main_dur = min(inputs[0]["end_time"], einf[0]["orig_duration"])
+        st_main = trims[0][2]
+    main_dur = min(inputs[0]["end_time"], durs[0])
     if st_main < main_dur:
         if not _desired_dur_is_too_small(
             st_main, main_dur):
@@ -524,6 +549,20 @@ Negative time was found %s for '%s'. """,
                     "main": (0, st_main, main_dur),
                     })
 
+    # Format all the time ranges at once (as "%.3f") instead of
+    # doing it for each filter.
+    slots = []  # [(container, key), ...]
+    for ins in trims_list:
+        if "main" in ins:
+            slots.append((ins, "main"))
+        for trims in ins.get("intercuts", {}).values():
+            slots.extend((trims, j) for j in range(len(trims)))
+    if slots:
+        ranges = np.char.mod("%.3f", np.array(
+                [c[k][1:] for c, k in slots], dtype=np.float64))
+        for (c, k), (s, e) in zip(slots, ranges):
+            c[k] = (c[k][0], s, e)
+
     return files, inputs, trims_list, qual, outparams
 
 
@@ -532,15 +571,19 @@ def build(definition, known_delay_map, summarizer_params, outparams, clear_cache
     files, inputs, trims_list, qual, outparams = _make_list_of_trims(
         definition, known_delay_map, summarizer_params, outparams, clear_cache)
 
+    has_video = all(qual["has_video"])
+
     # make filter templates
     ftmpl = []
     for inp in inputs:
-        f_v = Filter()
-        f_v.add_filter("fps", fps=outparams.fps)
-        f_v.add_filter("scale", outparams.width, outparams.height)
-        f_v.add_filter(inp.get("v_extra_filter"))
-        f_v.add_filter("setpts", "PTS-STARTPTS")
-        f_v.add_filter("setsar", "1")
+        f_v = None  # video streams are never used if any one lacks video.
+        if has_video:
+            f_v = Filter()
+            f_v.add_filter("fps", fps=outparams.fps)
+            f_v.add_filter("scale", outparams.width, outparams.height)
+            f_v.add_filter(inp.get("v_extra_filter"))
+            f_v.add_filter("setpts", "PTS-STARTPTS")
+            f_v.add_filter("setsar", "1")
         f_a = Filter()
         f_a.add_filter("aresample", outparams.sample_rate)
         f_a.add_filter(inp.get("a_extra_filter"))
@@ -550,24 +593,26 @@ def build(definition, known_delay_map, summarizer_params, outparams, clear_cache
     result_fg = []
 
     fconcat = Filter()
+    # every segment feeds its labels into this one concat filter.
+    _concat_iv = fconcat.iv.append
+    _concat_ia = fconcat.ia.append
     def _mk_trimfilter(is_video, idx, trim_range):
-        ftrim_range = ["%.3f" % r for r in trim_range]
+        # trim_range has already been formatted by _make_list_of_trims.
         if is_video:
-            f = deepcopy(ftmpl[int(idx)][0])
-            f.iv.append("[%d:v]" % int(idx))
+            f = deepcopy(ftmpl[idx][0])
+            f.iv.append("[%d:v]" % idx)
             f.insert_filter(
                 1, "trim",
-                *ftrim_range)
+                *trim_range)
             f.append_outlabel_v()
         else:
-            f = deepcopy(ftmpl[int(idx)][1])
-            f.ia.append("[%d:a]" % int(idx))
+            f = deepcopy(ftmpl[idx][1])
+            f.ia.append("[%d:a]" % idx)
             f.insert_filter(
                 1, "atrim",
-                *ftrim_range)
+                *trim_range)
             f.append_outlabel_a()
         return f
-    has_video = all(qual["has_video"])
     for ins in trims_list:
         if "main" in ins:
             # main before intercuts
@@ -579,8 +624,8 @@ def build(definition, known_delay_map, summarizer_params, outparams, clear_cache
                 result_fg.append(fmb_v.to_str())
             result_fg.append(fmb_a.to_str())
             if has_video:
-                fconcat.iv.append(fmb_v.ov[0])
-            fconcat.ia.append(fmb_a.oa[0])
+                _concat_iv(fmb_v.ov[0])
+            _concat_ia(fmb_a.oa[0])
         #
         if "intercuts" not in ins:
             continue
@@ -605,13 +650,13 @@ def build(definition, known_delay_map, summarizer_params, outparams, clear_cache
                 fovl.add_filter(ins["video_mode"], vfilt)
                 fovl.add_filter(ins.get("v_extra_filter"))
                 fovl.append_outlabel_v()
-                fconcat.iv.append(fovl.ov[0])
+                _concat_iv(fovl.ov[0])
                 result_fg.append(fvs[0].to_str())
                 result_fg.append(fvs[1].to_str())
                 result_fg.append(fovl.to_str())
             else:
                 fvs[0].add_filter(ins.get("v_extra_filter"))
-                fconcat.iv.append(fvs[0].ov[0])
+                _concat_iv(fvs[0].ov[0])
                 result_fg.append(fvs[0].to_str())
         #
         audios = ins["intercuts"]["audios"]
@@ -630,11 +675,11 @@ def build(definition, known_delay_map, summarizer_params, outparams, clear_cache
             for fa in fas:
                 result_fg.append(fa.to_str())
             result_fg.append(fam.to_str())
-            fconcat.ia.append(fam.oa[0])
+            _concat_ia(fam.oa[0])
         else:
             fas[0].add_filter(ins.get("a_extra_filter"))
             result_fg.append(fas[0].to_str())
-            fconcat.ia.append(fas[0].oa[0])
+            _concat_ia(fas[0].oa[0])
 
     fconcat.add_filter(
         "concat",
@@ -12,11 +12,12 @@ import sys
 import json
 import logging
 
-from .align import SyncDetector
+from .align import cached_align
 from .utils import check_and_decode_filenames
 from . import cli_common
 from .utils import (
     check_and_decode_filenames,
+    json_loads,
     path2url,
 )
 
@@ -103,16 +104,18 @@ $(document).ready(function() {
 </body>
 </html>"""
 
-_tmpl_media = {
-    True: """\
-<%(media_type)s id="%(ident_prefix)s%(index)d" width="%(width)d" height="%(height)d" controls>
-  <source src="%(media)s" type="%(media_detailtype)s">
-</%(media_type)s>""",
-    False: """\
-<%(media_type)s id="%(ident_prefix)s%(index)d" controls>
-  <source src="%(media)s" type="%(media_detailtype)s">
-</%(media_type)s>""",
-}
+def _media_with_size(media_type, ident, width, height, media, media_detailtype):
+    return """\
+<%s id="%s" width="%d" height="%d" controls>
+  <source src="%s" type="%s">
+</%s>""" % (media_type, ident, width, height, media, media_detailtype, media_type)
+
+
+def _media_without_size(media_type, ident, media, media_detailtype):
+    return """\
+<%s id="%s" controls>
+  <source src="%s" type="%s">
+</%s>""" % (media_type, ident, media, media_detailtype, media_type)
 
 
 _MEDIA_TYPES = {
@@ -132,47 +135,45 @@ _MEDIA_TYPES = {
 
 
 def build(args):
-    shape = json.loads(args.shape) if args.shape else (2, 2)
+    shape = args.shape or (2, 2)  # (already decoded by the parser)
     files = check_and_decode_filenames(args.files)
-    with SyncDetector(
+    einf = cached_align(
+        files,
         params=args.summarizer_params,
-        clear_cache=args.clear_cache) as sd:
-        einf = sd.align(
-            files,
-            known_delay_map=args.known_delay_map)
+        known_delay_map=args.known_delay_map,
+        clear_cache=args.clear_cache)
 
     ident_prefix = "simltplayer"
 
-    medias = []
-    for i, inf in enumerate(einf):
-        ext = os.path.splitext(args.files[i])[1].lower()
-        has_video = inf["orig_streams_summary"]["num_video_streams"] > 0
-        medias.append(_tmpl_media[has_video] % dict(
-                media_type=_MEDIA_TYPES[(ext, has_video)][0],
-                ident_prefix=ident_prefix,
-                index=i,
-                width=args.w,
-                height=args.h,
-                media=path2url(files[i]),
-                media_detailtype=_MEDIA_TYPES[(ext, has_video)][1],
-                ))
-
-    medias_tab = ["<table>"]
-    for i, m in enumerate(medias):
-        if i % shape[0] == 0:
-            if i > 0:
-                medias_tab.append("</tr>")
-            medias_tab.append("<tr>")
-        medias_tab.append("<td>")
-        medias_tab.append(m)
-        medias_tab.append("</td>")
-    medias_tab.append("</tr>")
-    medias_tab.append("</table>")
+    w, h = args.w, args.h
+    cols = shape[0]
+    exts = [os.path.splitext(f)[1].lower() for f in args.files]
+    has_videos = [
+        inf["orig_streams_summary"]["num_video_streams"] > 0 for inf in einf]
+    rows, cells = [], []
+    for i, (ext, has_video) in enumerate(zip(exts, has_videos)):
+        media_type, media_detailtype = _MEDIA_TYPES[(ext, has_video)]
+        ident = "%s%d" % (ident_prefix, i)
+        if has_video:
+            media = _media_with_size(
+                media_type, ident, w, h,
+                path2url(files[i]), media_detailtype)
+        else:
+            media = _media_without_size(
+                media_type, ident,
+                path2url(files[i]), media_detailtype)
+        cells.append("<td>\n%s\n</td>" % media)
+        if len(cells) == cols:
+            rows.append("<tr>\n%s\n</tr>" % "\n".join(cells))
+            cells = []
+    if cells:
+        rows.append("<tr>\n%s\n</tr>" % "\n".join(cells))
+    medias_tab = "<table>\n%s\n</table>" % "\n".join(rows)
 
     outer = _tmpl_outer % dict(
         ident_prefix=ident_prefix,
-        delays=[float("%.3f" % inf["trim"]) for inf in einf],
-        medias_tab="\n".join(medias_tab))
+        delays=json.dumps([round(inf["trim"], 3) for inf in einf]),
+        medias_tab=medias_tab)
     return outer
 
 
@@ -184,7 +185,7 @@ Create a simultaneous playing player using the video and audio elements of html
         help="The media files which contains both video and audio.")
     #####
     parser.add_argument(
-        '--shape', type=str, default="[2, 2]",
+        '--shape', type=json_loads, default="[2, 2]",
         help="The shape of the tile, like '[2, 2]'. (default: %(default)s)")
     parser.add_argument(
         '--width-per-cell', dest="w", type=int, default=480,
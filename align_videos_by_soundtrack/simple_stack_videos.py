@@ -12,17 +12,14 @@ movies of multiple angles in a tile shape with "hstack" and "vstack".
 from __future__ import unicode_literals
 from __future__ import absolute_import
 
-import json
 import sys
 import os
 import logging
+from itertools import cycle, islice
 
-import numpy as np
-
-from .align import SyncDetector
 from .communicate import call_ffmpeg_with_filtercomplex
 from .ffmpeg_filter_graph import Filter, ConcatWithGapFilterGraphBuilder
-from .utils import check_and_decode_filenames
+from .utils import check_and_decode_filenames, json_loads
 from . import cli_common
 
 
@@ -32,10 +29,12 @@ _logger = logging.getLogger(__name__)
 class _StackVideosFilterGraphBuilder(object):
     def __init__(self, shape=(2, 2), w=960, h=540, fps=29.97, sample_rate=44100):
         self._shape = shape
-        self._builders = []
-        for i in range(shape[0] * shape[1]):
-            self._builders.append(
-                ConcatWithGapFilterGraphBuilder(i, w, h, fps, sample_rate))
+        self._ncells = shape[0] * shape[1]
+        _builder = ConcatWithGapFilterGraphBuilder
+        self._builders = [
+            _builder(i, w, h, fps, sample_rate)
+            for i in range(self._ncells)]
+        self._each_streams = None  # the result of build_each_streams
 
     def set_paddings(self, idx, pre, post, v_filter_extra, a_filter_extra):
         self._builders[idx].add_video_gap(pre)
@@ -46,48 +45,57 @@ class _StackVideosFilterGraphBuilder(object):
         self._builders[idx].add_audio_gap(post)
 
     def build_each_streams(self):
-        result = []
-        _r = []
-        len_stacks = len(self._builders)
-        for i in range(len_stacks):
-            _r.append(self._builders[i].build())
-            result.append(_r[i][0])
+        # ConcatWithGapFilterGraphBuilder#build can not be called twice,
+        # so keep the result for the later calls.
+        if self._each_streams is not None:
+            return self._each_streams
+        result, vmaps, amaps = [], [], []
+        for b in self._builders:
+            fg, vmap, amap = b.build()
+            result.append(fg)
+            vmaps.append(vmap)
+            amaps.append(amap)
 
         # filters string array, video maps, audio maps
-        return result, [_ri[1] for _ri in _r], [_ri[2] for _ri in _r]
+        self._each_streams = (result, vmaps, amaps)
+        return self._each_streams
 
     def build_stack_videos(self, ivmaps):
-        result = []
+        if self._ncells == 1:
+            # nothing to stack, the only cell is the result as is.
+            return [], list(ivmaps)
 
-        ovmaps = ['[v]']
+        result = []
         # stacks for video
-        fvstack = Filter()
         if self._shape[0] > 1:
+            rows = []
+            ncols = self._shape[0]
             for i in range(self._shape[1]):
+                row = ivmaps[i * ncols:(i + 1) * ncols]
                 fhstack = Filter()
-                fhstack.iv.extend(ivmaps[i * self._shape[0]:(i + 1) * self._shape[0]])
-                inputs = len(ivmaps[
-                        i * self._shape[0]:(i + 1) * self._shape[0]])
+                fhstack.iv.extend(row)
                 fhstack.add_filter(
                     "hstack",
-                    inputs=inputs,
+                    inputs=len(row),
                     shortest="1")
                 olab = "[{}v]".format("%d" % (i + 1) if self._shape[1] > 1 else "")
                 fhstack.ov.append(olab)
                 result.append(fhstack.to_str())
 
-                fvstack.iv.append(olab)
+                rows.append(olab)
         else:
-            fvstack.iv.extend(ivmaps)
+            rows = ivmaps
 
         if self._shape[1] > 1:
             # vstack
+            fvstack = Filter()
+            fvstack.iv.extend(rows)
             fvstack.add_filter(
                 "vstack", inputs=self._shape[1], shortest="1")
             fvstack.ov.append("[v]")
             result.append(fvstack.to_str())
 
-        return result, ovmaps
+        return result, ['[v]']
 
     def build_amerge_audio(self, iamaps):
         #
@@ -95,18 +103,13 @@ class _StackVideosFilterGraphBuilder(object):
 
         # stacks for audio (amerge)
         nch = 2
-        weight = 1 - np.array(
-            [i // self._shape[0] for i in range(self._shape[0] * nch)])
-        ch = [
-            " + ".join([
-                    "c%d" % (i)
-                    for i in range(len(iamaps) * nch)
-                    if weight[i % (self._shape[0] * nch)]]),
-            " + ".join([
-                    "c%d" % (i)
-                    for i in range(len(iamaps) * nch)
-                    if (1 - weight)[i % (self._shape[0] * nch)]])
-            ]
+        # The first half of the channels of each tile row goes to c0, the
+        # other half to c1. The pattern repeats every row (shape[0] * nch).
+        stride = self._shape[0] * nch
+        ch = ([], [])
+        for i in range(len(iamaps) * nch):
+            ch[(i % stride) >= self._shape[0]].append("c%d" % i)
+        ch = [" + ".join(ch[0]), " + ".join(ch[1])]
         result.append("""\
 {}
 amerge=inputs={},
@@ -114,7 +117,7 @@ pan=stereo|\\
     c0 < {} |\\
     c1 < {}
 [a]""".format("".join(iamaps),
-              len(self._builders), ch[0], ch[1],))
+              self._ncells, ch[0], ch[1],))
 
         #
         return result, ['[a]']
@@ -125,33 +128,41 @@ pan=stereo|\\
     {}
     amerge=inputs={}
     [a]""".format("".join(iamaps),
-                len(self._builders),))
+                self._ncells,))
 
             #
             return result, ['[a]']
 
 
 def _build(args):
-    shape = json.loads(args.shape) if args.shape else (2, 2)
+    shape = args.shape or (2, 2)  # (already decoded by the parser)
     files = check_and_decode_filenames(
         args.files,
         min_num_files=2, exit_if_error=True)
-    if len(files) < shape[0] * shape[1]:
-        files = files + [files[i % len(files)]
-                         for i in range(shape[0] * shape[1] - len(files))]
-    else:
-        files = files[:shape[0] * shape[1]]
+    # repeat the files if fewer than the cells, or drop the excess.
+    files = list(islice(cycle(files), shape[0] * shape[1]))
     #
-    a_filter_extra = args.a_filter_extra
-    v_filter_extra = args.v_filter_extra
+    # (--a_filter_extra and --v_filter_extra have been already decoded
+    # by AvstArgumentParser.) Merge the filters for all streams and for
+    # each stream once here.
+    def _merged_filters(filter_extra):
+        base = filter_extra.get("") or ""
+        sep = "," if base else ""
+        result = []
+        for i in range(len(files)):
+            per = filter_extra.get(str(i))
+            result.append(base + sep + per if per else base)
+        return result
+    vfs = _merged_filters(args.v_filter_extra)
+    afs = _merged_filters(args.a_filter_extra)
     #
-    with SyncDetector(
-        params=args.summarizer_params,
-        clear_cache=args.clear_cache) as det:
+    from .align import SyncDetector, cached_align  # heavy (numpy/scipy)
 
-        ares = det.align(
-            files,
-            known_delay_map=args.known_delay_map)
+    ares = cached_align(
+        files,
+        params=args.summarizer_params,
+        known_delay_map=args.known_delay_map,
+        clear_cache=args.clear_cache)
     qual = SyncDetector.summarize_stream_infos(ares)
     outparams = args.outparams
     outparams.fix_params(qual)
@@ -180,9 +191,7 @@ def _build(args):
             #  avoid it, so let's add meaningless padding as a workaround.
             post = post + 1.0
 
-        vf = ",".join(filter(None, [v_filter_extra.get(""), v_filter_extra.get("%d" % i)]))
-        af = ",".join(filter(None, [a_filter_extra.get(""), a_filter_extra.get("%d" % i)]))
-        b.set_paddings(i, pre, post, vf, af)
+        b.set_paddings(i, pre, post, vfs[i], afs[i])
 
     #
     filters = []
@@ -241,7 +250,7 @@ implies --audio_mode='individual'. (default: %(default)s)""")
     parser.editor_add_filter_extra_arguments()
     #####
     parser.add_argument(
-        '--shape', type=str, default="[2, 2]",
+        '--shape', type=json_loads, default="[2, 2]",
         help="The shape of the tile, like '[2, 2]'. (default: %(default)s)")
     parser.add_argument(
         '--width-per-cell', dest="w", type=int, default=960,
@@ -254,7 +263,15 @@ implies --audio_mode='individual'. (default: %(default)s)""")
     #####
     args = parser.parse_args(args[1:])
     cli_common.logger_config()
-    
+    run(args)
+
+
+def run(args):
+    """
+    Do the work of `main` with already parsed arguments. This is for
+    driving this script as a library, without argparse and without
+    configuring logging.
+    """
     files, fc, (vmap, amap) = _build(args)
     if args.video_mode == 'individual' or args.audio_mode == 'individual':
         outbase, outext = os.path.splitext(args.outfile)
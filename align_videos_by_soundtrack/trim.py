@@ -10,8 +10,8 @@ from __future__ import absolute_import
 
 import sys
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
-from .align import SyncDetector
 from .communicate import (
     check_call,
     duration_to_hhmmss)
@@ -32,6 +32,11 @@ Trim media based on synchronization with audio tracks.""")
         "-o", "--outdir", default="_dest")
     parser.add_argument(
         "--trim_end", action="store_true")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="""\
+The number of ffmpeg processes to run at the same time. Note that each \
+ffmpeg is already multi-threaded. (default: %(default)d)""")
     #####
     args = parser.parse_args(args[1:])
     cli_common.logger_config()
@@ -42,6 +47,19 @@ Trim media based on synchronization with audio tracks.""")
         sys.exit(1)
 
     import os
+    outfiles = [
+        os.path.join(args.outdir, os.path.basename(fn)) for fn in files]
+    if len(set(outfiles)) < len(outfiles):
+        # they would overwrite each other (at the same time, with --jobs).
+        seen = set()
+        for fn, outfn in zip(files, outfiles):
+            if outfn in seen:
+                _logger.error("{}: {} is already the output of another file.".format(
+                        fn, outfn))
+            seen.add(outfn)
+        sys.exit(1)
+    from .align import SyncDetector  # heavy (numpy/scipy), so after parsing
+
     if not os.path.exists(args.outdir):
         os.mkdir(args.outdir)
     with SyncDetector(
@@ -51,7 +69,8 @@ Trim media based on synchronization with audio tracks.""")
             files,
             known_delay_map=args.known_delay_map)
 
-        for fn, editinfo in list(zip(files, infos)):
+        cmds = []
+        for fn, outfn, editinfo in list(zip(files, outfiles, infos)):
             start_offset = editinfo["trim"]
             duration = editinfo["orig_duration"] - start_offset - editinfo["trim_post"]
             if start_offset > 0 or duration > 0:
@@ -63,5 +82,17 @@ Trim media based on synchronization with audio tracks.""")
                     cmd.extend(["-t", "%.3f" % duration])
                 #cmd.extend(["-c:v", "copy"])
                 #cmd.extend(["-c:a", "copy"])
-                cmd.append(os.path.join(args.outdir, os.path.basename(fn)))
-                check_call(cmd)
+                cmd.append(outfn)
+                cmds.append(cmd)
+
+    # Each trimming is independent from the others, and check_call only
+    # waits for ffmpeg, so threads are enough.
+    jobs = max(1, min(args.jobs, len(cmds)))
+    if jobs == 1:
+        for cmd in cmds:
+            check_call(cmd)
+    else:
+        # Running ones must not fight over the terminal.
+        cmds = [cmd[:1] + ["-nostdin"] + cmd[1:] for cmd in cmds]
+        with ThreadPoolExecutor(max_workers=jobs) as ex:
+            list(ex.map(check_call, cmds))  # (re-raises the first failure)
@@ -9,6 +9,8 @@ from __future__ import absolute_import
 import sys
 import os
 import io
+import re
+import pathlib
 import json
 import logging
 
@@ -26,14 +28,25 @@ __all__ = [
 _logger = logging.getLogger(__name__)
 
 
-if hasattr("", "decode"):  # python 2
-    def _decode(s):
-        if isinstance(s, (str,)):  # bytes in python 2
-            return s.decode(sys.getfilesystemencoding())
-        return s
-else:
-    def _decode(s):
-        return s
+def _files_found_by_scandir(paths):
+    # One directory listing instead of one stat per file, for directories
+    # holding several of the given paths.  A path not seen here is not
+    # necessarily missing (e.g. on case-insensitive filesystems), so the
+    # caller must still stat the rest.
+    bydir = {}
+    for path in paths:
+        bydir.setdefault(os.path.dirname(path), []).append(path)
+    found = set()
+    for d, dpaths in bydir.items():
+        if len(dpaths) < 2:
+            continue
+        try:
+            with os.scandir(d) as it:
+                names = set(e.name for e in it if e.is_file())
+        except OSError:
+            continue
+        found.update(p for p in dpaths if os.path.basename(p) in names)
+    return found
 
 
 def check_and_decode_filenames(
@@ -41,8 +54,11 @@ def check_and_decode_filenames(
     min_num_files=0,
     exit_if_error=False):
 
-    result = list(map(_decode, map(os.path.abspath, files)))
-    nf_files = [path for path in result if not os.path.isfile(path)]
+    result = list(map(os.path.abspath, files))
+    found = _files_found_by_scandir(result)
+    nf_files = [
+        path for path in result
+        if path not in found and not os.path.isfile(path)]
     if nf_files:
         for nf in nf_files:
             _logger.error("{}: No such file.".format(nf))
@@ -65,18 +81,24 @@ def check_and_decode_filenames(
 # Configuration related
 #
 
+# C-style comments, or string literals (which may contain "/*").
+_json_comment_pat = re.compile(
+    r'''/\*.*?\*/|"(?:\\.|[^\\"])*"''',
+    re.DOTALL | re.MULTILINE)
+
+
+def _json_comment_repl(m):
+    s = m.group(0)
+    return " " if s[0] == "/" else s
+
+
 def json_loads(jsonsting):
-    import re
-    _pat = re.compile(
-        r'''/\*.*?\*/|"(?:\\.|[^\\"])*"''',
-        re.DOTALL | re.MULTILINE)
-    def _repl(m):
-        s = m.group(0)
-        if s.startswith("/"):
-            return " "
-        else:
-            return s
-    return json.loads(re.sub(_pat, _repl, jsonsting))
+    """
+    >>> d = json_loads('{"a": 1 /* comment */, "b": "/* not comment */"}')
+    >>> print(json.dumps(d, sort_keys=True))
+    {"a": 1, "b": "/* not comment */"}
+    """
+    return json.loads(_json_comment_pat.sub(_json_comment_repl, jsonsting))
 
 
 def json_load(jsonfilename):
@@ -91,15 +113,31 @@ def json_load(jsonfilename):
 def validate_type_one_by_template(
     chktrg, tmpl, depthstr="",
     size_min=1, size_max=-1, exit_on_error=True):
-
-    if type(chktrg) != type(tmpl):
+    """
+    >>> validate_type_one_by_template([1, 2], [], "x", size_max=2)
+    True
+    >>> validate_type_one_by_template(5, 0, "x", size_min=0)
+    True
+    >>> validate_type_one_by_template(
+    ...     True, 0, "x", size_min=0, exit_on_error=False)
+    False
+    """
+    # "tmpl" may be a sample value or the type itself, so that callers
+    # checking many items can resolve the type once.
+    tmpl_type = tmpl if isinstance(tmpl, type) else type(tmpl)
+    # (bool is a subclass of int, but True is not a valid count etc.)
+    if not isinstance(chktrg, tmpl_type) or (
+            isinstance(chktrg, bool) and tmpl_type is not bool):
         _logger.error("""%s must be %s""" % (
-                depthstr, type(tmpl)))
+                depthstr, tmpl_type))
         if exit_on_error:
             sys.exit(1)
         return False
-    if ((size_min > 0 and len(chktrg) < size_min) or (
-            size_max > 0 and len(chktrg) > size_max)):
+    if size_min <= 0 and size_max <= 0:
+        return True  # no length to check (chktrg may be a scalar).
+    n = len(chktrg)
+    if ((size_min > 0 and n < size_min) or (
+            size_max > 0 and n > size_max)):
         if size_min > 0 and size_max <= 0:
             bs = "greater equal than %d" % size_min
         elif size_min <= 0 and size_max > 0:
@@ -116,14 +154,9 @@ def validate_type_one_by_template(
     return True
 
 
-def validate_dict_one_by_template(
-    chktrg, tmpl, mandkeys=[], depthstr="", not_empty=True, exit_on_error=True):
-
-    if not validate_type_one_by_template(
-        chktrg, tmpl, depthstr,
-        size_min=1 if (not_empty or mandkeys) else 0,
-        exit_on_error=exit_on_error):
-        return False
+def _validate_dict_keys(
+    chktrg, allow_keys, mandkeys, depthstr, exit_on_error):
+    # "allow_keys" must be a set.
     depthstr = "in %s" % depthstr if depthstr else ""
     for mk in mandkeys:
         if mk not in chktrg:
@@ -132,8 +165,7 @@ def validate_dict_one_by_template(
             if exit_on_error:
                 sys.exit(1)
             return False
-    allow_keys = tmpl.keys()
-    unk = (set(allow_keys) | set(chktrg.keys())) - set(allow_keys)
+    unk = set(chktrg) - allow_keys
     if unk:
         _logger.error("""Unknown keys %s: %s""" % (
                 depthstr, ", ".join(list(unk))))
@@ -143,40 +175,46 @@ def validate_dict_one_by_template(
     return True
 
 
+def validate_dict_one_by_template(
+    chktrg, tmpl, mandkeys=[], depthstr="", not_empty=True, exit_on_error=True):
+
+    if not validate_type_one_by_template(
+        chktrg, tmpl, depthstr,
+        size_min=1 if (not_empty or mandkeys) else 0,
+        exit_on_error=exit_on_error):
+        return False
+    return _validate_dict_keys(
+        chktrg, set(tmpl), mandkeys, depthstr, exit_on_error)
+
+
 def validate_list_of_dict_one_by_template(
     chktrg, itemdict_tmpl, itemdict_mandkeys=[], depthstr="",
     list_size_min=1, list_size_max=-1,
     itemdict_not_empty=True, exit_on_error=True):
 
     if not validate_type_one_by_template(
-        chktrg, [itemdict_tmpl], depthstr,
+        chktrg, list, depthstr,
         list_size_min, list_size_max, exit_on_error):
         return False
 
+    # these are the same for all items.
+    item_type = type(itemdict_tmpl)
+    item_size_min = 1 if (itemdict_not_empty or itemdict_mandkeys) else 0
+    allow_keys = set(itemdict_tmpl)
     for i, td in enumerate(chktrg):
-        if not validate_dict_one_by_template(
-            td, itemdict_tmpl, itemdict_mandkeys,
-            depthstr + "[%d]" % i,
-            itemdict_not_empty,
-            exit_on_error):
+        item_depthstr = depthstr + "[%d]" % i
+        if not (validate_type_one_by_template(
+                td, item_type, item_depthstr,
+                size_min=item_size_min,
+                exit_on_error=exit_on_error) and _validate_dict_keys(
+                td, allow_keys, itemdict_mandkeys,
+                item_depthstr, exit_on_error)):
             return False
     return True
 
 
-try:
-    import pathlib  # python 3.4+
-
-    def path2url(path):
-        return pathlib.Path(os.path.abspath(path)).as_uri()
-except ImportError:
-    # python 2
-    # (we would not support python 3.0 ~ 3.3.)
-    import urlparse
-    import urllib
-
-    def path2url(path):
-        return urlparse.urljoin(
-            'file:', urllib.pathname2url(os.path.abspath(path)))
+def path2url(path):
+    return pathlib.Path(os.path.abspath(path)).as_uri()
 
 
 if __name__ == '__main__':
@@ -1,77 +1,53 @@
 #! /usr/bin/env python
-from __future__ import with_statement
-
 import os.path
+import re
+from pathlib import Path
+
+from setuptools import setup
+from setuptools.command.sdist import sdist
+
+
+# (open() accepts "/" on every platform.)
+_INIT_FILE = 'align_videos_by_soundtrack/__init__.py'
+_VERSION_FILE = 'align_videos_by_soundtrack/_version.py'
+_VERSION_RE = re.compile(br'''__version__\s*=\s*['"]([^'"]+)['"]''')
+
 
-try:
-    from setuptools import setup
-except ImportError:
-    # TODO: Decide whether to force "setuptools" or even to users
-    #       with "distutils" only.
-    from distutils.core import setup
-    extra = {'scripts': [
-            "bin/alignment_info_by_sound_track",
-            "bin/simple_stack_videos_by_sound_track",
-            ]}
-else:
-    extra = {
-        #'test_suite': 'align_videos_by_sound_track.test',
-        'entry_points': {
-            'console_scripts': [
-                'alignment_info_by_sound_track = align_videos_by_soundtrack.align:main',
-                'concat_videos_by_sound_track = align_videos_by_soundtrack.concat:main',
-                'simple_stack_videos_by_sound_track = align_videos_by_soundtrack.simple_stack_videos:main',
-                'trim_by_sound_track = align_videos_by_soundtrack.trim:main',
-                'simple_compile_videos_by_sound_track = align_videos_by_soundtrack.simple_compile_videos:main',
-                'simple_html5_simult_player_builder_by_sound_track = align_videos_by_soundtrack.simple_html5_simult_player_builder:main',
-                ],
-        },
-    }
+def get_version(fname=None):
+    if fname is None:
+        # An unpacked sdist has the version alone in _version.py.
+        fname = _VERSION_FILE
+        if not os.path.exists(fname):
+            fname = _INIT_FILE
+    with open(fname, 'rb') as f:
+        # stops reading at the first match.
+        matches = (_VERSION_RE.match(line) for line in f)
+        m = next((m for m in matches if m), None)
+    if not m:
+        raise RuntimeError("Unable to find __version__ in %s" % fname)
+    return m.group(1).decode('ascii')
 
 
-def get_version(fname=os.path.join('align_videos_by_soundtrack', '__init__.py')):
-    with open(fname) as f:
-        for line in f:
-            if line.startswith('__version__'):
-                return eval(line.split('=')[-1])
+class sdist_with_version(sdist):
+    """Write the version into _version.py of the release tree."""
+    def make_release_tree(self, base_dir, files):
+        sdist.make_release_tree(self, base_dir, files)
+        fname = os.path.join(base_dir, _VERSION_FILE)
+        if os.path.exists(fname):
+            os.remove(fname)  # may be a hard link to our own source
+        with open(fname, 'w') as f:
+            f.write('__version__ = "%s"\n' % get_version())
 
 
 def get_long_description():
-    descr = []
-    for fname in ('README.md',):  # for PyPI, actually rst is suitable rather than markdown.
-        with open(fname) as f:
-            descr.append(f.read())
-    return '\n\n'.join(descr)
+    # for PyPI, actually rst is suitable rather than markdown.
+    return Path(__file__).resolve().with_name('README.md').read_text(
+        encoding='utf-8')
 
 
 setup(
-    name="align_videos_by_sound_track",
-    #license="MIT",    # choose as you like
+    # the static metadata is in setup.cfg.
     version=get_version(),
-    description="Align videos/sound files timewise with help of their soundtracks",
+    cmdclass={'sdist': sdist_with_version},
     long_description=get_long_description(),
-    author="Jorgen Modin",
-    author_email="jorgen@webworks.se",
-    url="https://github.com/jeorgen/align-videos-by-sound/",
-    packages=[
-        "align_videos_by_soundtrack",
-        ],
-    python_requires='>=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*',
-    classifiers=[
-        "Development Status :: 1 - Planning",
-        "Environment :: Console",
-        "Intended Audience :: End Users/Desktop",
-        #"License :: OSI Approved :: MIT License",  # choose as you like
-        "Programming Language :: Python",
-        "Programming Language :: Python :: 2",
-        "Programming Language :: Python :: 2.7",
-        "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.4",
-        "Programming Language :: Python :: 3.5",
-        "Programming Language :: Python :: 3.6",
-        "Programming Language :: Python :: 3.7",
-        "Programming Language :: Python :: Implementation :: CPython",
-        "Programming Language :: Python :: Implementation :: PyPy",
-        "Topic :: Utilities",
-    ],
-    **extra)
+    )